@@ -1,18 +1,90 @@
 from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.serving import WSGIRequestHandler
 import time
 import json
 import random
 import threading
-import queue
 import os
+from collections import deque
+
+try:
+    import orjson
+except ImportError:  # Optional C encoder; the stdlib one is used otherwise
+    orjson = None
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for request.json and jsonify."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Add static folder config for serving React build
 app = Flask(__name__, static_folder='../static', static_url_path='')
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 CORS(app)
 
-# Global event queue for broadcasting to all clients
-event_queue = queue.Queue()
+# Mock deployment output, served from the static folder
+OUTPUT_DIR = os.path.join(app.static_folder, 'output')
+MOCK_OUTPUT_HTML = (
+    "<html><body style='background:#111; color:#fff; font-family:sans-serif; display:flex; justify-content:center; align-items:center; height:100vh;'>"
+    "<div><h1 style='color:#b91c1c;'>Mocha Orchestrator Dashboard</h1><p>Baked fresh by Ralph v8.0</p></div>"
+    "</body></html>"
+).encode("utf-8")
+
+class LatestSnapshot:
+    """Single-slot holder for the most recent event.
+
+    The producer overwrites the slot instead of queueing, so memory stays
+    bounded regardless of how slow (or absent) the SSE clients are. Each
+    client tracks the sequence number it last sent and only wakes up for
+    newer events.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._seq = 0
+        self._subscribers = 0
+
+    @property
+    def subscribers(self):
+        """Number of clients currently streaming."""
+        return self._subscribers
+
+    def subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def publish(self, value):
+        """Replaces the current event and wakes up all waiting clients."""
+        with self._cond:
+            self._value = value
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, last_seq=0, timeout=None):
+        """Waits for an event newer than last_seq; returns (seq, value)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > last_seq, timeout)
+            return self._seq, self._value
+
+# Latest event broadcast to all clients
+snapshot = LatestSnapshot()
+
+# Ring buffer size for session logs; older entries are evicted automatically
+LOG_BUFFER_SIZE = 500
+# Number of most recent log entries sent with each update
+LOG_TAIL_SIZE = 50
 
 # Global state for task simulation
 task_state = {
@@ -21,40 +93,128 @@ task_state = {
         {"id": 2, "name": "Data Ingestion", "status": "running"},
         {"id": 3, "name": "Model Training", "status": "pending"}
     ],
-    "logs": [
-        f"Log entry {int(time.time())}: System check OK"
-    ]
+    "logs": deque(maxlen=LOG_BUFFER_SIZE)
+}
+
+# Guards task mutations against concurrent snapshot serialization
+state_lock = threading.Lock()
+
+# Nested subtasks of each root task, indexed by id: {root_id: {subtask_id: node}}
+_subtask_index = {}
+
+# Rolling window of the newest logs, kept in step with task_state["logs"]
+recent_logs = deque(maxlen=LOG_TAIL_SIZE)
+
+def _dumps(obj):
+    """Serializes obj to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+# Set whenever tasks or logs change so the producer publishes right away
+_state_changed = threading.Event()
+
+# Serialized task list, rebuilt only when the tasks change
+_tasks_version = 0
+_tasks_json_cache = (-1, b"[]")
+
+def _mark_tasks_changed():
+    """Invalidates the cached task list JSON."""
+    global _tasks_version
+    _tasks_version += 1
+    _state_changed.set()
+
+def _tasks_json():
+    """Returns the task list as JSON, re-serializing only after a change."""
+    global _tasks_json_cache
+    version = _tasks_version
+    if _tasks_json_cache[0] != version:
+        _tasks_json_cache = (version, _dumps(task_state["tasks"]))
+    return _tasks_json_cache[1]
+
+def _index_subtasks(root_task):
+    """Builds the id -> node index for every nested subtask of a root task."""
+    index = {}
+    stack = list(root_task.get("children", ()))
+    while stack:
+        node = stack.pop()
+        index[node["id"]] = node
+        stack.extend(node.get("children", ()))
+    _subtask_index[root_task["id"]] = index
+
+def _now_ms():
+    """Returns the current time as integer milliseconds, as JavaScript expects."""
+    return time.time_ns() // 1_000_000
+
+def _add_log(entry):
+    """Appends a log entry to the session log and the broadcast window."""
+    task_state["logs"].append(entry)
+    recent_logs.append(entry)
+    _state_changed.set()
+
+_add_log(f"Log entry {int(time.time())}: System check OK")
+
+def _log_tail():
+    """Returns the most recent log entries as a list."""
+    return list(recent_logs)
+
+# Reusable update frame; only the producer thread touches it and it is
+# serialized before the next tick overwrites the fields
+_update_frame = {
+    "type": "update",
+    "timestamp": 0,
+    "cpu_usage": 0,
+    "memory_usage": 0,
+    "active_tasks": 0,
+    "logs": []
 }
 
 def generate_sample_data():
-    """Generates sample data and puts it into the queue."""
+    """Generates sample data and publishes it as the latest snapshot."""
     while True:
+        # Nobody is listening; skip building the snapshot
+        if not snapshot.subscribers:
+            time.sleep(1)
+            continue
+
         # Simulate some random updates to validation stats
-        data = {
-            "type": "update",
-            "timestamp": time.time(),
-            "cpu_usage": random.randint(10, 90),
-            "memory_usage": random.randint(20, 80),
-            "active_tasks": len([t for t in task_state["tasks"] if t["status"] == "running"]),
-            "tasks": task_state["tasks"],
-            "logs": task_state["logs"][-50:] # Keep last 50 logs
-        }
-        event_queue.put(data)
-        time.sleep(1)
+        _update_frame["timestamp"] = _now_ms()
+        _update_frame["cpu_usage"] = random.randint(10, 90)
+        _update_frame["memory_usage"] = random.randint(20, 80)
+        # Read the tasks under the lock so the frame reflects one consistent state
+        with state_lock:
+            _update_frame["active_tasks"] = len([t for t in task_state["tasks"] if t["status"] == "running"])
+            _update_frame["logs"] = _log_tail()
+            tasks_json = _tasks_json()
+        data = _dumps(_update_frame)
+        # Splice in the cached task list instead of re-encoding it every tick
+        snapshot.publish(data[:-1] + b',"tasks":' + tasks_json + b"}")
+        # Tick once a second for the stats, or as soon as the state changes
+        _state_changed.wait(1)
+        _state_changed.clear()
 
 # Start generator thread
 threading.Thread(target=generate_sample_data, daemon=True).start()
 
 def sse_generator():
-    """Yields events from the queue to the client."""
-    while True:
-        try:
-            # Get data from queue, blocking until available
-            data = event_queue.get()
-            yield f"data: {json.dumps(data)}\n\n"
-        except Exception as e:
-            print(f"Stream error: {e}")
-            break
+    """Yields the latest event to the client whenever a new one is published."""
+    last_seq = 0
+    snapshot.subscribe()
+    try:
+        while True:
+            try:
+                seq, data = snapshot.get(last_seq, timeout=30)
+                if seq == last_seq:
+                    # No new event; keep the connection alive
+                    yield b": keep-alive\n\n"
+                    continue
+                last_seq = seq
+                yield b"data: " + data + b"\n\n"
+            except Exception as e:
+                print(f"Stream error: {e}")
+                break
+    finally:
+        snapshot.unsubscribe()
 
 @app.route('/')
 def index():
@@ -62,7 +222,14 @@ def index():
 
 @app.route('/api/stream')
 def stream():
-    return Response(sse_generator(), mimetype='text/event-stream')
+    # Frames are already encoded bytes; hand them to the server untouched.
+    # Keep caches and reverse proxies from holding back events.
+    return Response(
+        sse_generator(),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        direct_passthrough=True
+    )
 
 @app.route('/api/stats', methods=['GET'])
 def stats():
@@ -78,9 +245,9 @@ def console():
     command = data.get('command', '')
     
     # Add log entry
-    timestamp = time.time()
+    timestamp = _now_ms()
     log_message = f"User command: {command}"
-    task_state["logs"].append({
+    _add_log({
         "type": "INFO",
         "message": log_message,
         "timestamp": timestamp
@@ -89,24 +256,27 @@ def console():
     if command:
         if "landing page" in command.lower():
             # Complex task simulation
-            root_id = max([t["id"] for t in task_state["tasks"]]) + 1 if task_state["tasks"] else 1
-            main_task = {
-                "id": root_id, 
-                "name": f"Project: {command}", 
-                "status": "running",
-                "children": [
-                    {"id": root_id + 1, "name": "Strategic Discovery", "status": "completed", "details": "Analyzing target audience and competitive landscape."},
-                    {"id": root_id + 2, "name": "Brand Identity Design", "status": "running", "children": [
-                        {"id": root_id + 3, "name": "Color Palette Generation", "status": "completed"},
-                        {"id": root_id + 4, "name": "Typography Selection", "status": "running"}
-                    ]},
-                    {"id": root_id + 5, "name": "Module Engineering", "status": "pending", "children": [
-                        {"id": root_id + 6, "name": "Interactive Hero Section", "status": "pending"},
-                        {"id": root_id + 7, "name": "Responsive Grid Layout", "status": "pending"}
-                    ]}
-                ] 
-            }
-            task_state["tasks"].append(main_task)
+            with state_lock:
+                root_id = max([t["id"] for t in task_state["tasks"]]) + 1 if task_state["tasks"] else 1
+                main_task = {
+                    "id": root_id, 
+                    "name": f"Project: {command}", 
+                    "status": "running",
+                    "children": [
+                        {"id": root_id + 1, "name": "Strategic Discovery", "status": "completed", "details": "Analyzing target audience and competitive landscape."},
+                        {"id": root_id + 2, "name": "Brand Identity Design", "status": "running", "children": [
+                            {"id": root_id + 3, "name": "Color Palette Generation", "status": "completed"},
+                            {"id": root_id + 4, "name": "Typography Selection", "status": "running"}
+                        ]},
+                        {"id": root_id + 5, "name": "Module Engineering", "status": "pending", "children": [
+                            {"id": root_id + 6, "name": "Interactive Hero Section", "status": "pending"},
+                            {"id": root_id + 7, "name": "Responsive Grid Layout", "status": "pending"}
+                        ]}
+                    ] 
+                }
+                task_state["tasks"].append(main_task)
+                _index_subtasks(main_task)
+                _mark_tasks_changed()
             
             # Simulate progress
             def run_complex_sim():
@@ -123,33 +293,34 @@ def console():
                 time.sleep(2)
                 update_subtask_status(root_id, root_id + 7, "completed")
                 update_subtask_status(root_id, root_id + 5, "completed")
-                main_task["status"] = "completed"
+                with state_lock:
+                    main_task["status"] = "completed"
+                    _mark_tasks_changed()
                 
                 # Generate Mock Output
-                output_dir = os.path.join(app.static_folder, 'output')
-                os.makedirs(output_dir, exist_ok=True)
-                with open(os.path.join(output_dir, 'coffee-shop.html'), 'w') as f:
-                    f.write("<html><body style='background:#111; color:#fff; font-family:sans-serif; display:flex; justify-content:center; align-items:center; height:100vh;'>")
-                    f.write("<div><h1 style='color:#b91c1c;'>Mocha Orchestrator Dashboard</h1><p>Baked fresh by Ralph v8.0</p></div>")
-                    f.write("</body></html>")
+                os.makedirs(OUTPUT_DIR, exist_ok=True)
+                with open(os.path.join(OUTPUT_DIR, 'coffee-shop.html'), 'wb') as f:
+                    f.write(MOCK_OUTPUT_HTML)
                 
-                task_state["logs"].append({
+                _add_log({
                     "type": "SUCCESS",
                     "message": "Deployment complete! Preview at /output/coffee-shop.html",
-                    "timestamp": time.time()
+                    "timestamp": _now_ms()
                 })
 
             threading.Thread(target=run_complex_sim, daemon=True).start()
         else:
             # Simple task simulation
-            new_task_id = max([t["id"] for t in task_state["tasks"]]) + 1 if task_state["tasks"] else 1
-            new_task = {
-                "id": new_task_id, 
-                "name": f"Task: {command}", 
-                "status": "pending",
-                "children": [] 
-            }
-            task_state["tasks"].append(new_task)
+            with state_lock:
+                new_task_id = max([t["id"] for t in task_state["tasks"]]) + 1 if task_state["tasks"] else 1
+                new_task = {
+                    "id": new_task_id, 
+                    "name": f"Task: {command}", 
+                    "status": "pending",
+                    "children": [] 
+                }
+                task_state["tasks"].append(new_task)
+                _mark_tasks_changed()
             threading.Timer(1.0, lambda: update_task_status(new_task_id, "running")).start()
             threading.Timer(4.0, lambda: update_task_status(new_task_id, "completed")).start()
 
@@ -161,36 +332,74 @@ def console():
 
 @app.route('/api/reset', methods=['POST'])
 def reset():
-    global task_state
-    task_state = {
-        "tasks": [],
-        "logs": [f"Session reset at {time.strftime('%H:%M:%S')}"]
-    }
-    # Optional: Clear queue or broadcast a 'reset' event
-    event_queue.put({"type": "reset", "timestamp": time.time()})
+    with state_lock:
+        # Clear in place so the containers keep their identity across resets
+        task_state["tasks"].clear()
+        task_state["logs"].clear()
+        recent_logs.clear()
+        _subtask_index.clear()
+        _add_log(f"Session reset at {time.strftime('%H:%M:%S')}")
+        _mark_tasks_changed()
+    # Broadcast a 'reset' event so clients clear their view
+    snapshot.publish(_dumps({"type": "reset", "timestamp": _now_ms()}))
     return jsonify({"status": "success", "message": "Session reset"})
 
 def update_task_status(task_id, status):
-    for task in task_state["tasks"]:
-        if task["id"] == task_id:
-            task["status"] = status
-            break
+    with state_lock:
+        for task in task_state["tasks"]:
+            if task["id"] == task_id:
+                task["status"] = status
+                _mark_tasks_changed()
+                break
 
 def update_subtask_status(root_id, subtask_id, status):
-    """Deep search for subtask to update status."""
-    def _find_and_update(tasks):
-        for t in tasks:
-            if t["id"] == subtask_id:
-                t["status"] = status
-                return True
-            if "children" in t and _find_and_update(t["children"]):
-                return True
-        return False
-    _find_and_update(task_state["tasks"])
+    """Updates the status of a nested subtask of the given root task."""
+    with state_lock:
+        subtask = _subtask_index.get(root_id, {}).get(subtask_id)
+        if subtask is not None:
+            subtask["status"] = status
+            _mark_tasks_changed()
+
+
+class NoDelayRequestHandler(WSGIRequestHandler):
+    """Dev server request handler that sets TCP_NODELAY, as waitress does,
+    so small SSE frames are not held back by Nagle's algorithm."""
+
+    disable_nagle_algorithm = True
+
+
+def serve(host="127.0.0.1", port=5000, debug=False):
+    """
+    Serve the dashboard with waitress, falling back to the Flask dev server.
+
+    waitress is a pure-Python production WSGI server that runs natively on
+    Windows (gunicorn does not), so SSE clients no longer go through the
+    Werkzeug development server. Pass debug=True to use the Flask dev server
+    with the reloader and debugger instead.
+    """
+    if not debug:
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            print("waitress not installed; falling back to the Flask development server")
+        else:
+            # Each SSE client holds a worker thread for as long as it streams,
+            # so leave headroom for API calls alongside a few open dashboards
+            waitress_serve(app, host=host, port=port, threads=8,
+                           channel_timeout=300, connection_limit=200)
+            return
+    app.run(debug=debug, host=host, port=port, threaded=True,
+            request_handler=NoDelayRequestHandler)
 
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ralph Dashboard Backend")
+    parser.add_argument("--debug", action="store_true", help="Use the Flask development server")
+    args = parser.parse_args()
+
     print("Starting Ralph Dashboard Backend...")
     print("Verify at http://localhost:5000")
-    app.run(debug=True, port=5000, threaded=True)
+    serve(debug=args.debug)
 
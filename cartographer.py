@@ -27,6 +27,13 @@ from typing import Optional
 import os
 
 
+# Source file extensions listed by the custom walker (a tuple, as str.endswith needs)
+_MAP_EXTENSIONS = ('.py', '.js', '.ts', '.md', '.json', '.yml', '.yaml')
+
+# Directories the custom walker never descends into
+_SKIP_DIRS = frozenset({'.git', '__pycache__', 'node_modules', 'venv', 'env'})
+
+
 def _generate_basic_map(target_dir: Path, output_path: Path) -> None:
     """
     Generate basic file structure map using custom walker.
@@ -37,43 +44,50 @@ def _generate_basic_map(target_dir: Path, output_path: Path) -> None:
         target_dir: Root directory to map
         output_path: Output file path for map
     """
-    map_lines = [
-        "# Codebase Architectural Map",
-        "",
-        "## Auto-Generated Structure",
-        "",
-        "```\n"
-    ]
-    
-    try:
-        for root, dirs, files in os.walk(target_dir):
-            # Skip common directories
-            dirs[:] = [d for d in dirs if d not in ['.git', '__pycache__', 'node_modules', 'venv', 'env']]
-            
-            level = len(Path(root).relative_to(target_dir).parts) if root != str(target_dir) else 0
-            indent = "  " * level
-            
-            # Add directory
-            dir_name = Path(root).name if root != str(target_dir) else target_dir.name
-            map_lines.append(f"{indent}{dir_name}/")
-            
-            # Add files
-            for file in sorted(files):
-                if file.endswith(('.py', '.js', '.ts', '.md', '.json', '.yml', '.yaml')):
-                    map_lines.append(f"{indent}  {file}")
-    
-    except Exception as e:
-        map_lines.append(f"Error generating map: {e}")
-    
-    map_lines.append("```\n")
-    map_lines.append("\n## Notes")
-    map_lines.append("- Generated by custom walker (codesum unavailable)")
-    map_lines.append("- Focuses on source files (.py, .js, .ts, .md)")
-    map_lines.append("- Excludes: .git, __pycache__, node_modules, venv")
-    
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write each line straight to the buffered file instead of collecting
+    # the whole map in a list and joining it at the end
     with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(map_lines))
+        f.write("# Codebase Architectural Map\n\n## Auto-Generated Structure\n\n```\n\n")
+        
+        try:
+            # Preorder scandir DFS in name order; DirEntry caches the file type
+            # from the directory read, so no extra stat call is needed per entry
+            stack = [(str(target_dir), target_dir.name, 0)]
+            while stack:
+                dir_path, dir_name, level = stack.pop()
+                try:
+                    with os.scandir(dir_path) as it:
+                        entries = sorted(it, key=lambda e: e.name)
+                except OSError:
+                    continue
+                
+                indent = "  " * level
+                
+                # Add directory
+                f.write(f"{indent}{dir_name}/\n")
+                
+                subdirs = []
+                for entry in entries:
+                    # Symlinks are neither descended into nor listed
+                    if entry.is_dir(follow_symlinks=False):
+                        # Skip common directories
+                        if entry.name not in _SKIP_DIRS:
+                            subdirs.append(entry)
+                    # Add files
+                    elif entry.name.endswith(_MAP_EXTENSIONS) and entry.is_file(follow_symlinks=False):
+                        f.write(f"{indent}  {entry.name}\n")
+                
+                stack.extend((e.path, e.name, level + 1) for e in reversed(subdirs))
+        
+        except Exception as e:
+            f.write(f"Error generating map: {e}\n")
+        
+        f.write("```\n\n")
+        f.write("\n## Notes\n")
+        f.write("- Generated by custom walker (codesum unavailable)\n")
+        f.write("- Focuses on source files (.py, .js, .ts, .md)\n")
+        f.write("- Excludes: .git, __pycache__, node_modules, venv")
 
 
 def generate_map(target_dir: Path, output_path: Optional[Path] = None) -> bool:
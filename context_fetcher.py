@@ -20,22 +20,133 @@ WINDOWS-SPECIFIC CONSIDERATIONS:
 - UTF-8 encoding for all search operations
 """
 import os
+import shutil
 import subprocess
-import re
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+# Worker threads for the fallback file scan
+_SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Number of recent fallback search results kept per fetcher
+_RESULT_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=None)
+def _which(name: str) -> Optional[str]:
+    """Cached shutil.which; scanning PATH is slow on Windows."""
+    return shutil.which(name)
+
+
+def _hit_lines(lowered, original, needle, newline):
+    """
+    Yield (line_no, line) for up to 3 lines of original containing needle.
+    
+    Jumps between hits in the lowered text instead of splitting and
+    lowercasing every line. Works on str or bytes; lowered must have the
+    same length as original so offsets line up.
+    """
+    found = 0
+    line_no, counted = 1, 0
+    pos = lowered.find(needle)
+    while pos >= 0:
+        start = lowered.rfind(newline, 0, pos) + 1
+        end = lowered.find(newline, pos)
+        if end < 0:
+            end = len(lowered)
+        if pos + len(needle) > end:
+            # Hit spans a line break; lines are matched individually
+            pos = lowered.find(needle, pos + 1)
+            continue
+        line_no += lowered.count(newline, counted, start)
+        counted = start
+        yield line_no, original[start:end]
+        found += 1
+        if found >= 3:  # Limit to 3 lines per file
+            return
+        pos = lowered.find(needle, end + 1)
+
+
+def _scan_file(path: str, query_lower: str, query_bytes: Optional[bytes]) -> List[str]:
+    """
+    Find up to 3 lines of a file containing the query (case-insensitive).
+    
+    Args:
+        path: File to scan
+        query_lower: Lowercased search query
+        query_bytes: ASCII-encoded query_lower, or None for non-ASCII queries
+        
+    Returns:
+        Formatted matching lines, empty if the file does not match
+    """
+    try:
+        data = Path(path).read_bytes()
+    except (PermissionError, OSError):
+        return []
+    
+    # Drop a UTF-8 BOM so BOM-prefixed ASCII files take the fast path
+    if data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    
+    # Pure ASCII files are searched as bytes, where bytes.lower() matches
+    # str.lower(); only the matched lines are decoded
+    if data.isascii():
+        data_lower = data.lower()
+        if query_bytes is None or data_lower.find(query_bytes) < 0:
+            return []
+        return [f"  Line {i}: {line.decode('ascii').strip()}"
+                for i, line in _hit_lines(data_lower, data, query_bytes, b"\n")]
+    
+    content = data.decode("utf-8", errors="ignore")
+    lowered = content.lower()
+    
+    # Check if query appears in file
+    if query_lower not in lowered:
+        return []
+    
+    matching_lines = []
+    if len(lowered) != len(content):
+        # lower() changed the width of some characters, so offsets in the
+        # lowered text no longer line up with the original; split instead
+        for i, line in enumerate(content.split('\n'), 1):
+            if query_lower in line.lower():
+                matching_lines.append(f"  Line {i}: {line.strip()}")
+                if len(matching_lines) >= 3:  # Limit to 3 lines per file
+                    break
+        return matching_lines
+    
+    return [f"  Line {i}: {line.strip()}"
+            for i, line in _hit_lines(lowered, content, query_lower, "\n")]
 
 
 class ContextFetcher:
     """Tiered context retrieval with automatic fallback."""
     
+    # Directories never searched by the regex fallback
+    _SKIP_DIRS = frozenset({'.git', '__pycache__', 'node_modules', 'venv', 'env', '.venv'})
+    
+    # Common source file extensions searched by the regex fallback
+    _EXT_WHITELIST = frozenset({
+        '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h', '.cs',
+        '.rb', '.go', '.rs', '.php', '.html', '.css', '.md', '.json', '.yml', '.yaml'
+    })
+    
     def __init__(self, project_root: Path):
         self.project_root = project_root
         self.openground_failures = 0
         self.max_openground_failures = 2
         self.use_openground = True
         self.openground_path = self._find_openground()
+        # path -> (mtime_ns, size) of the files seen by the last fallback scan;
+        # the generation is bumped whenever that set or any stamp changes
+        self._file_stamps: Dict[str, Tuple[int, int]] = {}
+        self._generation = 0
+        # query -> (generation, formatted result), least recent first
+        self._results: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
     
     def _find_openground(self) -> Optional[Path]:
         """Find openground binary in common locations."""
@@ -48,9 +159,9 @@ class ContextFetcher:
         for candidate in candidates:
             if isinstance(candidate, str):
                 # Check if in PATH
-                import shutil
-                if shutil.which(candidate):
-                    return Path(shutil.which(candidate))
+                found = _which(candidate)
+                if found:
+                    return Path(found)
             else:
                 if candidate.exists():
                     return candidate
@@ -78,22 +189,23 @@ class ContextFetcher:
         try:
             start_time = time.time()
             
+            # Capture raw bytes; only non-empty output is decoded
             result = subprocess.run(
                 [str(self.openground_path), "search", query],
                 capture_output=True,
-                text=True,
                 shell=False,
                 timeout=10,
                 check=True,
                 cwd=str(self.project_root),
-                encoding="utf-8"
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
             )
             
             elapsed = time.time() - start_time
             print(f" Openground search: {elapsed:.2f}s")
             
-            if result.stdout.strip():
-                return result.stdout.strip()
+            output = result.stdout.strip()
+            if output:
+                return output.decode("utf-8", errors="replace")
             return None
             
         except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
@@ -105,6 +217,46 @@ class ContextFetcher:
             print(f" Openground unexpected error ({self.openground_failures}/{self.max_openground_failures}): {e}")
             return None
     
+    def _candidate_files(self) -> List[Tuple[str, int, int]]:
+        """
+        Collect source files under the project root for the regex fallback.
+        
+        Returns:
+            (path, mtime_ns, size) of files with a whitelisted extension
+        """
+        candidates = []
+        # Stack-based scandir DFS: DirEntry caches the file type from the
+        # directory read, so no extra stat call is needed per entry
+        stack = [str(self.project_root)]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Skip common directories
+                            if entry.name not in self._SKIP_DIRS:
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    
+                    # Check if file has a source extension
+                    name = entry.name
+                    if name[name.rfind('.'):] not in self._EXT_WHITELIST:
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    candidates.append((entry.path, st.st_mtime_ns, st.st_size))
+        return candidates
+    
     def _regex_fallback_search(self, query: str) -> str:
         """
         Fallback regex search when Openground unavailable.
@@ -119,52 +271,52 @@ class ContextFetcher:
         
         results = []
         query_lower = query.lower()
-        
-        # Common source file patterns
-        patterns = [
-            r'\.(py|js|ts|jsx|tsx|java|cpp|c|h|cs|rb|go|rs|php|html|css|md|json|yml|yaml)$'
-        ]
+        # Byte form for the pre-scan; only exact when the query is ASCII
+        query_bytes = query_lower.encode("ascii") if query_lower.isascii() else None
         
         try:
-            # Note: Path.walk() requires Python 3.12+. Falling back to os.walk for 3.11 compatibility if needed, 
-            # but using Path.walk per master spec requirements for consistency with other scripts.
-            for root, dirs, files in os.walk(str(self.project_root)):
-                # Skip common directories
-                dirs[:] = [d for d in dirs if d not in ['.git', '__pycache__', 'node_modules', 'venv', 'env', '.venv']]
-                
-                for file in files:
-                    # Check if file matches pattern
-                    if not any(re.search(pattern, file) for pattern in patterns):
-                        continue
-                    
-                    file_path = Path(root) / file
-                    
-                    try:
-                        content = file_path.read_text(encoding="utf-8", errors="ignore")
-                        
-                        # Check if query appears in file
-                        if query_lower in content.lower():
-                            # Extract matching lines
-                            matching_lines = []
-                            for i, line in enumerate(content.split('\n'), 1):
-                                if query_lower in line.lower():
-                                    matching_lines.append(f"  Line {i}: {line.strip()}")
-                                    if len(matching_lines) >= 3:  # Limit to 3 lines per file
-                                        break
-                            
-                            if matching_lines:
-                                results.append(f"\n {file_path.relative_to(self.project_root)}")
-                                results.extend(matching_lines)
-                    
-                    except (UnicodeDecodeError, PermissionError, OSError):
-                        continue
+            candidates = self._candidate_files()
+            # Compared as whole dicts in C; any added, removed or modified
+            # file invalidates every cached result
+            stamps = {path: (mtime_ns, size) for path, mtime_ns, size in candidates}
+            if stamps != self._file_stamps:
+                self._file_stamps = stamps
+                self._generation += 1
+            generation = self._generation
+            
+            # Nothing changed since this query last ran; reuse its result
+            cached = self._results.get(query)
+            if cached is not None and cached[0] == generation:
+                self._results.move_to_end(query)
+                return cached[1]
+            
+            # File reads release the GIL, so a thread pool overlaps the I/O;
+            # map() keeps results in traversal order
+            paths = [path for path, _, _ in candidates]
+            scan = partial(_scan_file, query_lower=query_lower, query_bytes=query_bytes)
+            with ThreadPoolExecutor(max_workers=_SCAN_WORKERS) as executor:
+                for path, matching_lines in zip(paths, executor.map(scan, paths)):
+                    if matching_lines:
+                        results.append(f"\n {Path(path).relative_to(self.project_root)}")
+                        results.extend(matching_lines)
+            complete = True
         
         except Exception as e:
             print(f" Regex search error: {e}")
+            complete = False
         
         if results:
-            return "# Regex Fallback Search Results\n\n" + "\n".join(results)
-        return f"# Regex Fallback Search\n\nNo matches found for: {query}"
+            output = "# Regex Fallback Search Results\n\n" + "\n".join(results)
+        else:
+            output = f"# Regex Fallback Search\n\nNo matches found for: {query}"
+        
+        # Only cache complete scans
+        if complete:
+            self._results[query] = (generation, output)
+            self._results.move_to_end(query)
+            if len(self._results) > _RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return output
     
     def fetch_context(self, query: str, use_openground: bool = True) -> str:
         """
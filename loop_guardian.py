@@ -31,6 +31,17 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# normalize_output substitutions, compiled once and applied in this order;
+# passes whose pattern needs a literal are skipped when it is absent
+_TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2}[T\s]\d{2}:\d{2}:\d{2}[\.\dZ]*')
+_UNIX_TIMESTAMP_RE = re.compile(r'\b\d{10,}\b')
+_HEX_ADDR_RE = re.compile(r'0x[0-9a-fA-F]+')
+_ITERATION_RE = re.compile(r'iteration\s+\d+', re.IGNORECASE)
+_WINDOWS_PATH_RE = re.compile(r'[a-zA-Z]:\\[\\\w\s\-\.]+')
+_UNIX_PATH_RE = re.compile(r'/([\w\-\.]+/)+[\w\-\.]+')
+_PID_RE = re.compile(r'pid=\d+')
+_TID_RE = re.compile(r'tid=\d+')
+
 
 class LoopGuardian:
     """
@@ -208,7 +219,7 @@ def normalize_output(output: str) -> str:
     2. Strip hex addresses (memory pointers, object IDs)  
     3. Strip iteration counters
     4. Normalize paths (Windows C:\ and Linux /home/)
-    5. Strip memory addresses
+    5. Strip memory addresses (done by step 2, as [HEX_ADDR])
     6. Strip Unix timestamps
     
     Args:
@@ -218,29 +229,34 @@ def normalize_output(output: str) -> str:
         Normalized string safe for hashing
     """
     # Strip ISO timestamps (e.g., "2026-02-13T10:30:00Z", "2026-02-13 10:30:00")
-    output = re.sub(r'\d{4}-\d{2}-\d{2}[T\s]\d{2}:\d{2}:\d{2}[\.\dZ]*', '[TIMESTAMP]', output)
+    output = _TIMESTAMP_RE.sub('[TIMESTAMP]', output)
     
     # Strip Unix timestamps (10+ digit numbers)
-    output = re.sub(r'\b\d{10,}\b', '[UNIX_TIMESTAMP]', output)
+    output = _UNIX_TIMESTAMP_RE.sub('[UNIX_TIMESTAMP]', output)
     
     # Strip hex addresses (memory pointers, object IDs)
-    output = re.sub(r'0x[0-9a-fA-F]+', '[HEX_ADDR]', output)
+    if '0x' in output:
+        output = _HEX_ADDR_RE.sub('[HEX_ADDR]', output)
     
     # Strip iteration counters (case-insensitive)
-    output = re.sub(r'iteration\s+\d+', 'iteration [N]', output, flags=re.IGNORECASE)
+    output = _ITERATION_RE.sub('iteration [N]', output)
     
     # Strip Windows paths (e.g., "C:\Users\dev\main.py")
-    output = re.sub(r'[a-zA-Z]:\\[\\\w\s\-\.]+', '[PATH]', output)
+    if ':\\' in output:
+        output = _WINDOWS_PATH_RE.sub('[PATH]', output)
     
     # Strip Linux/Unix paths (e.g., "/home/dev/project/main.py")
-    output = re.sub(r'/([\w\-\.]+/)+[\w\-\.]+', '[PATH]', output)
+    if '/' in output:
+        output = _UNIX_PATH_RE.sub('[PATH]', output)
     
-    # Strip memory addresses (8-16 hex digits)
-    output = re.sub(r'\b0x[0-9a-fA-F]{8,16}\b', '[MEM_ADDR]', output)
+    # Memory addresses (8-16 hex digits) need no pass of their own: every
+    # 0x literal was already replaced with [HEX_ADDR] above
     
     # Strip process IDs and thread IDs
-    output = re.sub(r'pid=\d+', 'pid=[PID]', output)
-    output = re.sub(r'tid=\d+', 'tid=[TID]', output)
+    if 'pid=' in output:
+        output = _PID_RE.sub('pid=[PID]', output)
+    if 'tid=' in output:
+        output = _TID_RE.sub('tid=[TID]', output)
     
     return output
 
@@ -311,7 +327,7 @@ if __name__ == "__main__":
     print("Test 4: Memory address normalization")
     test4 = "Segmentation fault at 0x7fff5fbff000"
     result4 = normalize_output(test4)
-    assert "[MEM_ADDR]" in result4, "Should replace memory address"
+    assert "[HEX_ADDR]" in result4, "Should replace memory address"
     assert "0x7fff5fbff000" not in result4, "Should strip memory address"
     print(" PASS: Memory address normalization works\n")
     
@@ -128,6 +128,9 @@ def _create_activity_db(db_path: Path) -> None:
     """Create SQLite activity database with URI mode for Windows compatibility."""
     # URI mode ensures proper file locking on Windows
     conn = sqlite3.connect(f"file:{db_path}?mode=rwc", uri=True)
+    # WAL is persistent on the file: log writers skip the rollback journal's
+    # extra fsyncs and readers never block them
+    conn.execute("PRAGMA journal_mode=WAL")
     cursor = conn.cursor()
     
     cursor.execute("""
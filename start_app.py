@@ -118,7 +118,11 @@ def main():
     finally:
         if 'process' in locals() and process.poll() is None:
             process.terminate()
-            process.wait()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
             print("👋 distinct shutdown complete.")
 
 if __name__ == "__main__":
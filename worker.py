@@ -21,18 +21,65 @@ WINDOWS-SPECIFIC CONSIDERATIONS:
 - Git branch names sanitized to prevent path traversal
 """
 
+import atexit
 import os
 import sys
 import re
+import shutil
+import socket
 import subprocess
+import threading
 import tempfile
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional, Tuple
 import requests
 import time
 
-from loop_guardian import normalize_output, compute_normalized_hash
+# Obvious infinite-loop constructs, matched case-insensitively in one pass
+_LOOP_PATTERN_RE = re.compile(
+    r"while True:|while\(1\)|for\(;;\)|loop indefinitely",
+    re.IGNORECASE
+)
+
+# Runs of characters not allowed in branch names; \w- is exactly
+# str.isalnum() plus "-" and "_" for str patterns
+_BRANCH_SANITIZE_RE = re.compile(r"[^\w-]+")
+
+# Marker starting each file in a multi-file response
+_FILE_BLOCK_RE = re.compile(r"^# filename: ", re.MULTILINE)
+
+# Shared activity database, relative to the working directory the worker runs in
+_ACTIVITY_DB = Path("logs") / "activity.db"
+
+# Per-connection write-path tuning for the activity database
+_ACTIVITY_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+
+# Databases (absolute paths) this process has already switched to WAL and
+# given the ai_conversation table; both persist in the file
+_prepared_dbs = set()
+
+_AI_CONV_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS ai_conversation (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        role TEXT NOT NULL,
+        message TEXT NOT NULL
+    )
+"""
+
+# MCP Git server shared by every task in this process; started on first use
+# and stopped at interpreter exit
+_mcp_server: Optional[subprocess.Popen] = None
+_mcp_server_lock = threading.Lock()
+
+# How long a freshly launched MCP server gets to start listening
+_MCP_READY_TIMEOUT = 5.0
 
 class McpClient:
     """
@@ -47,12 +94,22 @@ class McpClient:
     
     def __init__(self, base_url: str = "http://127.0.0.1:8080"):
         self.base_url = base_url
+        # Keep-alive session so branch/checkout/commit reuse one connection
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self._session.mount("http://", adapter)
+        # Branch the subprocess fallback last checked out, if any
+        self._checked_out_branch: Optional[str] = None
+    
+    def close(self) -> None:
+        """Close pooled connections to the MCP server."""
+        self._session.close()
     
     def create_branch(self, name: str) -> None:
         """Create isolated Git branch via MCP."""
         sanitized_name = self._sanitize_branch_name(name)
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/branches",
                 json={"name": sanitized_name},
                 timeout=5
@@ -68,7 +125,7 @@ class McpClient:
         """Switch to specified branch."""
         sanitized_name = self._sanitize_branch_name(name)
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/checkout",
                 json={"branch": sanitized_name},
                 timeout=5
@@ -83,7 +140,7 @@ class McpClient:
     def commit(self, message: str) -> None:
         """Commit changes via MCP."""
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.base_url}/commit",
                 json={"message": message},
                 timeout=5
@@ -104,7 +161,7 @@ class McpClient:
         - Ensures Windows path compatibility
         - Maintains Git branch naming conventions
         """
-        sanitized = "".join(c for c in name if c.isalnum() or c in "-_")
+        sanitized = _BRANCH_SANITIZE_RE.sub("", name)
         return sanitized[:50]  # Limit length
     
     def _create_branch_subprocess(self, name: str) -> None:
@@ -119,6 +176,8 @@ class McpClient:
                 creationflags=subprocess.CREATE_NO_WINDOW,
                 check=True
             )
+            # checkout -b already switched, so a following switch_branch is a no-op
+            self._checked_out_branch = name
             print(f"[Git] Created branch via subprocess: {name}")
         except subprocess.SubprocessError as e:
             print(f" Git branch creation failed: {e}")
@@ -126,6 +185,9 @@ class McpClient:
     
     def _switch_branch_subprocess(self, name: str) -> None:
         """Fallback: Switch branch using subprocess Git."""
+        if name == self._checked_out_branch:
+            print(f"[Git] Already on branch: {name}")
+            return
         try:
             subprocess.run(
                 ["git", "checkout", name],
@@ -136,6 +198,7 @@ class McpClient:
                 creationflags=subprocess.CREATE_NO_WINDOW,
                 check=True
             )
+            self._checked_out_branch = name
             print(f"[Git] Switched to branch via subprocess: {name}")
         except subprocess.SubprocessError as e:
             print(f" Git checkout failed: {e}")
@@ -195,12 +258,12 @@ def execute_task(
         tmp_dir = Path(tempfile.gettempdir()) / "hybrid_orchestrator"
         tmp_dir.mkdir(parents=True, exist_ok=True)
     
-    # Launch MCP Git server for safe operations
-    mcp_process = _launch_mcp_git_server()
+    # Reuse (or launch) the MCP Git server for safe operations
+    _get_mcp_git_server()
+    mcp_client = McpClient()
     
     try:
         # Create isolated branch for this task
-        mcp_client = McpClient()
         task_id = _generate_task_id()
         branch_name = f"task-{task_id}"
         
@@ -219,12 +282,9 @@ def execute_task(
             _log_ai_conversation("AI", response[:500])
             
             # Parse multiple files (delimited by # filename: ...)
-            file_blocks = re.split(r"^# filename: ", response, flags=re.MULTILINE)
-            
-            all_bist_success = True
             saved_files = []
             
-            for block in file_blocks:
+            for block in _iter_file_blocks(response):
                 if not block.strip(): continue
                 lines = block.strip().splitlines()
                 filename = lines[0].strip()
@@ -235,14 +295,11 @@ def execute_task(
                 with open(tmp_path, "w", encoding="utf-8-sig") as f:
                     f.write(content)
                 
-                # Run BIST
-                if not _run_bist(tmp_path):
-                    print(f" BIST failed for: {filename}")
-                    all_bist_success = False
-                    break
-                
                 saved_files.append((tmp_path, filename))
             
+            # Every file is staged before testing, so blocks may import each other
+            all_bist_success = _run_bist_all(saved_files)
+            
             if all_bist_success and saved_files:
                 print(f" All {len(saved_files)} files passed BIST.")
                 
@@ -256,8 +313,9 @@ def execute_task(
                 
                 for tmp_path, filename in saved_files:
                     final_path = target_dir / filename
-                    with open(tmp_path, "r", encoding="utf-8-sig") as src, open(final_path, "w", encoding="utf-8-sig") as dst:
-                        dst.write(src.read())
+                    # The staged file already holds the final bytes: a rename on
+                    # the same volume, copy-and-delete across volumes
+                    shutil.move(str(tmp_path), str(final_path))
                     print(f" Persisted: {final_path}")
                 
                 # Commit from the new directory? git add . handles repo root.
@@ -274,38 +332,66 @@ def execute_task(
         return False
         
     finally:
-        # Cleanup MCP server
-        mcp_process.terminate()
-        try:
-            mcp_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            mcp_process.kill()
-        print(" MCP server terminated")
+        # The MCP server outlives the task; only this task's connections close
+        mcp_client.close()
+
+
+def _iter_file_blocks(response: str) -> Iterator[str]:
+    """
+    Yield the blocks between '# filename: ' markers, as re.split would.
+    
+    Blocks are sliced as the caller consumes them, so only the block being
+    staged is held alongside the response rather than a list of all of them.
+    """
+    start = 0
+    for match in _FILE_BLOCK_RE.finditer(response):
+        yield response[start:match.start()]
+        start = match.end()
+    yield response[start:]
+
+
+def connect_activity_db(db_path: Path, **kwargs) -> sqlite3.Connection:
+    """
+    Open the activity database read-write with the write-path PRAGMAs applied.
+    
+    Shared by the worker and the orchestrator. The first connection to each
+    database in this process also switches it to WAL and creates the
+    ai_conversation table. Extra keyword arguments go to sqlite3.connect.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=rw", uri=True, **kwargs)
+    try:
+        db_key = os.path.abspath(db_path)
+        if db_key not in _prepared_dbs:
+            # Journal mode cannot change inside a transaction
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(_AI_CONV_TABLE_SQL)
+            _prepared_dbs.add(db_key)
+        for pragma in _ACTIVITY_PRAGMAS:
+            conn.execute(pragma)
+    except Exception:
+        conn.close()
+        raise
+    return conn
 
 
 def _log_ai_conversation(role: str, message: str) -> None:
     """Log to the shared activity database."""
-    db_path = Path("logs") / "activity.db"
+    db_path = _ACTIVITY_DB
     try:
         if not db_path.exists():
             return
         
-        with sqlite3.connect(f"file:{db_path}?mode=rw", uri=True) as conn:
-            cursor = conn.cursor()
-            # Ensure ai_conversation table exists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS ai_conversation (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    role TEXT NOT NULL,
-                    message TEXT NOT NULL
+        conn = connect_activity_db(db_path)
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT INTO ai_conversation (role, message) VALUES (?, ?)",
+                    (role, message)
                 )
-            """)
-            cursor.execute(
-                "INSERT INTO ai_conversation (role, message) VALUES (?, ?)",
-                (role, message)
-            )
-            conn.commit()
+        finally:
+            conn.close()
     except Exception as e:
         print(f" Worker failed to log conversation: {e}")
 
@@ -320,13 +406,16 @@ def _launch_mcp_git_server() -> subprocess.Popen:
     - Binds to localhost only for security
     """
     try:
-        return subprocess.Popen(
+        process = subprocess.Popen(
             ["uvx", "mcp-server-git", "--port", "8080", "--host", "127.0.0.1"],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             shell=False,
             creationflags=subprocess.CREATE_NO_WINDOW
         )
+        if not _wait_for_port(process, "127.0.0.1", 8080, _MCP_READY_TIMEOUT):
+            print(" MCP server not listening yet. MCP operations may use subprocess fallback.")
+        return process
     except FileNotFoundError:
         print(" mcp-server-git not found. MCP operations will use subprocess fallback.")
         # Return dummy process that sleeps
@@ -339,6 +428,49 @@ def _launch_mcp_git_server() -> subprocess.Popen:
         )
 
 
+def _wait_for_port(process: subprocess.Popen, host: str, port: int, timeout: float) -> bool:
+    """
+    Poll until the server accepts TCP connections on host:port.
+    
+    Returns as soon as the port is bound instead of sleeping a fixed time;
+    gives up early if the process exits.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.1)
+            if sock.connect_ex((host, port)) == 0:
+                return True
+        time.sleep(0.05)
+    return False
+
+
+def _get_mcp_git_server() -> subprocess.Popen:
+    """Return the shared MCP Git server, launching it if not running."""
+    global _mcp_server
+    with _mcp_server_lock:
+        if _mcp_server is None or _mcp_server.poll() is not None:
+            if _mcp_server is None:
+                atexit.register(_shutdown_mcp_git_server)
+            _mcp_server = _launch_mcp_git_server()
+        return _mcp_server
+
+
+def _shutdown_mcp_git_server() -> None:
+    """Stop the shared MCP Git server, if one was launched."""
+    global _mcp_server
+    with _mcp_server_lock:
+        process, _mcp_server = _mcp_server, None
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    print(" MCP server terminated")
+
+
 def _generate_task_id() -> str:
     """Generate unique task ID."""
     import uuid
@@ -359,17 +491,9 @@ def _get_temperature_for_attempt(attempt: int) -> float:
     return temperatures[min(attempt, len(temperatures) - 1)]
 
 
-def _generate_code(plan: str, context: str, temperature: float) -> str:
-    """
-    Generate code simulations based on prompt keywords.
-    
-    NOTE: Real implementation would call LLM API.
-    This enhancement supports basic multi-file simulation for testing.
-    """
-    prompt = plan.lower()
-    
-    if "math_utils" in prompt and "main" in prompt:
-        return f'''# filename: math_utils.py
+# Simulated responses: (keywords that must all appear in the plan, response),
+# checked in order; built once instead of per call
+_MATH_UTILS_RESPONSE = '''# filename: math_utils.py
 def add(a, b):
     return a + b
 
@@ -377,27 +501,27 @@ def add(a, b):
 import math_utils
 def main():
     result = math_utils.add(5, 7)
-    print(f"Result: {{result}}")
+    print(f"Result: {result}")
     return result == 12
 
 if __name__ == "__main__":
     success = main()
     exit(0 if success else 1)
 '''
-    elif "process" in prompt:
-        return f'''# filename: data_processor.py
+
+_DATA_PROCESSOR_RESPONSE = '''# filename: data_processor.py
 import json
 
 def process_data(data):
     """Simple data processing simulation."""
-    return {{k: v.upper() for k, v in data.items() if isinstance(v, str)}}
+    return {k: v.upper() for k, v in data.items() if isinstance(v, str)}
 
 # filename: run_process.py
 import json
 from data_processor import process_data
 
 def main():
-    raw_data = {{"name": "hybrid", "type": "orchestrator", "version": 7}}
+    raw_data = {"name": "hybrid", "type": "orchestrator", "version": 7}
     processed = process_data(raw_data)
     print(json.dumps(processed))
     return "HYBRID" in processed.values()
@@ -406,8 +530,8 @@ if __name__ == "__main__":
     success = main()
     exit(0 if success else 1)
 '''
-    elif "hello" in prompt:
-        return f'''# filename: hello.py
+
+_HELLO_RESPONSE = '''# filename: hello.py
 def main():
     print("Hello, Hybrid Orchestrator!")
     return True
@@ -416,9 +540,8 @@ if __name__ == "__main__":
     main()
     exit(0)
 '''
-    
-    # Default template
-    return f'''# filename: task_default.py
+
+_DEFAULT_RESPONSE = '''# filename: task_default.py
 def main():
     print("Task completed successfully!")
     return True
@@ -428,6 +551,29 @@ if __name__ == "__main__":
     exit(0 if success else 1)
 '''
 
+_CODE_TEMPLATES = (
+    (("math_utils", "main"), _MATH_UTILS_RESPONSE),
+    (("process",), _DATA_PROCESSOR_RESPONSE),
+    (("hello",), _HELLO_RESPONSE),
+)
+
+
+def _generate_code(plan: str, context: str, temperature: float) -> str:
+    """
+    Generate code simulations based on prompt keywords.
+    
+    NOTE: Real implementation would call LLM API.
+    This enhancement supports basic multi-file simulation for testing.
+    """
+    prompt = plan.lower()
+    
+    for keywords, response in _CODE_TEMPLATES:
+        if all(keyword in prompt for keyword in keywords):
+            return response
+    
+    # Default template
+    return _DEFAULT_RESPONSE
+
 
 def _run_bist(code_path: Path) -> bool:
     """
@@ -438,6 +584,18 @@ def _run_bist(code_path: Path) -> bool:
     - Tests are included in generated code (--test flag)
     - Provides immediate feedback on correctness
     """
+    success, report = _bist_report(code_path)
+    print(report)
+    return success
+
+
+def _bist_report(code_path: Path) -> Tuple[bool, str]:
+    """
+    Run BIST on one file without printing.
+    
+    Returns:
+        Whether it passed, and the report text for the caller to print
+    """
     try:
         # Run the generated code
         result = subprocess.run(
@@ -453,18 +611,45 @@ def _run_bist(code_path: Path) -> bool:
         # success = result.returncode == 0 and "Task completed" in result.stdout
         # BIST passes if return code is 0 (script executed without error)
         success = result.returncode == 0
-        print(f"BIST Result: {'PASS' if success else 'FAIL'}")
-        print(f"  Return Code: {result.returncode}")
-        print(f"  Output: {result.stdout[:200]}")
+        report = (f"BIST Result: {'PASS' if success else 'FAIL'}\n"
+                  f"  Return Code: {result.returncode}\n"
+                  f"  Output: {result.stdout[:200]}")
         
-        return success
+        return success, report
         
     except subprocess.TimeoutExpired:
-        print(" BIST timeout (30s)")
-        return False
+        return False, " BIST timeout (30s)"
     except subprocess.SubprocessError as e:
-        print(f" BIST error: {e}")
-        return False
+        return False, f" BIST error: {e}"
+
+
+def _run_bist_all(files: list) -> bool:
+    """
+    Run BIST for each (path, filename) concurrently; True if all pass.
+    
+    Each run blocks in its own subprocess, so threads are enough. Reports
+    are printed from this thread as runs finish, so they never interleave.
+    The first failure cancels runs that have not started yet.
+    """
+    if len(files) <= 1:
+        for code_path, filename in files:
+            if not _run_bist(code_path):
+                print(f" BIST failed for: {filename}")
+                return False
+        return True
+    
+    workers = min(len(files), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_bist_report, code_path): filename for code_path, filename in files}
+        for future in as_completed(futures):
+            success, report = future.result()
+            print(report)
+            if not success:
+                print(f" BIST failed for: {futures[future]}")
+                for pending in futures:
+                    pending.cancel()
+                return False
+    return True
 
 
 def _detect_loop(code: str, attempt: int) -> bool:
@@ -479,20 +664,12 @@ def _detect_loop(code: str, attempt: int) -> bool:
     if attempt < 2:
         return False  # Need at least 3 attempts to detect loop
     
-    # In real implementation, this would track hash history
-    # For now, simulate loop detection based on content
-    normalized = normalize_output(code)
-    code_hash = compute_normalized_hash(code)
+    # In real implementation, this would track hash history (see
+    # LoopGuardian.detect_loop); until then the normalized hash is not
+    # computed, since nothing here would use it
     
     # Simple heuristic: check for obvious infinite loop patterns
-    loop_patterns = [
-        "while True:",
-        "while(1)",
-        "for(;;)",
-        "loop indefinitely"
-    ]
-    
-    return any(pattern in code.lower() for pattern in loop_patterns)
+    return _LOOP_PATTERN_RE.search(code) is not None
 
 
 # TEST SUITE - MUST PASS BEFORE PROCEEDING